@@ -1,16 +1,160 @@
 import streamlit as st
 import os
-import fitz  # PyMuPDF
-import json
+import orjson
+import hashlib
+import operator
+import asyncio
+import threading
+import itertools
+import string
+import re
+import diskcache
 from dotenv import load_dotenv
 
-# For Gemini integration
-import google.generativeai as genai
-import google.api_core.exceptions # For more specific Gemini error types
+# fitz (PyMuPDF) and google.generativeai are heavy imports, so they are imported lazily in the
+# functions that use them rather than on the first script run.
 
 # Load .env file if present (for local development convenience)
 load_dotenv()
 
+@st.cache_resource(show_spinner=False)
+def _get_generator(api_key: str, model_name: str):
+    """Build the model client once per (api_key, model_name).
+
+    genai.configure() is process-global and the model would otherwise read it lazily on its first
+    request, so a cached model could end up calling with another session's key. Both transports
+    are bound to `api_key` here instead.
+    """
+    import google.generativeai as genai
+    import google.ai.generativelanguage as glm
+    client_options = {"api_key": api_key}
+    model = genai.GenerativeModel(model_name)
+    model._client = glm.GenerativeServiceClient(client_options=client_options)
+
+    # grpc.aio channels bind to the event loop they are created on, so build the async client
+    # on the prefetch loop that will run generate_content_async.
+    async def _make_async_client():
+        return glm.GenerativeServiceAsyncClient(client_options=client_options)
+    model._async_client = asyncio.run_coroutine_threadsafe(_make_async_client(), _get_prefetch_loop()).result()
+    return model
+
+# Gemini responses are cached on disk so identical prompts skip the API, across sessions and restarts
+RESPONSE_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "interview_gen")
+RESPONSE_CACHE_TTL = 24 * 3600 # seconds
+# Re-render streamed output every N chunks rather than on every token
+STREAM_RENDER_EVERY = 8
+# Number of answers generated in the background right after a question set arrives
+ANSWER_PREFETCH_COUNT = 10
+# Max prefetch requests in flight at once, so low-RPM keys aren't rate limited (429) by the prefetch itself
+ANSWER_PREFETCH_CONCURRENCY = max(1, int(os.getenv("ANSWER_PREFETCH_CONCURRENCY", "2"))) # Semaphore(0) would never release
+
+@st.cache_resource(show_spinner=False)
+def _get_response_cache():
+    """Open the on-disk response cache once per process."""
+    return diskcache.Cache(RESPONSE_CACHE_DIR)
+
+# Prompt input budgets, at roughly 4 characters per token (~4K tokens resume, ~2K tokens JD)
+RESUME_MAX_CHARS = 16000
+JOB_DESCRIPTION_MAX_CHARS = 8000
+
+def _truncate(text: str, max_chars: int) -> str:
+    return text if len(text) <= max_chars else text[:max_chars] + "\n...[truncated]"
+
+# Gemini protobuf parts always expose .text (empty string if absent)
+_get_text = operator.attrgetter("text")
+
+def _response_cache_key(prompt: str, model_name: str, generation_config: dict | None = None) -> str:
+    # The generation config is part of the key so JSON mode and plain mode never share entries
+    config = orjson.dumps(generation_config, option=orjson.OPT_SORT_KEYS).decode()
+    return hashlib.sha256(f"{model_name}\n{config}\n{prompt}".encode()).hexdigest()
+
+@st.cache_resource(show_spinner=False)
+def _get_prefetch_loop():
+    """Start one long-lived event loop thread per process for answer prefetching."""
+    loop = asyncio.new_event_loop()
+    threading.Thread(target=loop.run_forever, name="answer-prefetch", daemon=True).start()
+    return loop
+
+# Static question-generation instructions. Kept as the prompt *prefix* (inputs go last) so
+# Gemini's implicit prompt caching can reuse it across requests.
+_STATIC_PROMPT_PREFIX = """
+You are an expert technical interviewer and career coach. Your task is to generate insightful interview questions based on the resume and job description provided at the end of this prompt. Aim for a comprehensive set of at least 25 questions, tailored to help a candidate prepare for internship interviews.
+
+**Question Generation Guidelines:**
+1.  **Relevance:** Prioritize questions that directly relate to skills, technologies, and experiences mentioned in BOTH the resume and the job description. If no JD, focus on resume.
+2.  **Depth & Breadth:** Cover a range of topics from fundamental concepts to practical application.
+3.  **Realism:** Formulate questions similar to those asked in actual internship interviews for tech roles.
+4.  **Progression:** Include questions suitable for different interview stages (screening, technical deep-dive).
+5.  **Clarity:** Ensure questions are unambiguous.
+
+**Question Categories (ensure a good distribution, aiming for 25+ total):**
+
+1.  **Technical Deep Dive (8-10 questions):**
+    *   Based on specific programming languages, frameworks, and tools listed (e.g., Python, React, Docker, Git).
+    *   Data structures and algorithms (e.g., "Explain how you would use a hash map to optimize [specific scenario from resume/JD]?").
+    *   Database concepts (SQL/NoSQL, querying, design if mentioned).
+    *   System design fundamentals (scaled appropriately for an intern, e.g., "How would you design a simple URL shortener, focusing on the API and data storage?").
+    *   Debugging and troubleshooting approaches.
+
+2.  **Project-Specific (6-8 questions):**
+    *   Probe into specific projects listed on the resume.
+    *   "On project X, you mentioned using Y technology. Can you walk me through a specific challenge you faced and how you overcame it?"
+    *   "What was your specific contribution to project Z? How did you collaborate with others?"
+    *   "If you could redo project A, what would you do differently and why?"
+    *   "How did you test your work on project B?"
+
+3.  **Behavioral & Situational (6-8 questions):** (Use STAR method for answering these)
+    *   "Describe a time you had to learn a new technology quickly for a project."
+    *   "Tell me about a challenging team project and how you handled disagreements."
+    *   "How do you approach a task when the requirements are unclear?"
+    *   "Describe a mistake you made and what you learned from it."
+    *   (If JD is present) "This role requires [skill from JD, e.g., 'strong problem-solving skills']. Can you give an example of how you've demonstrated this?"
+
+4.  **Scenario-Based/Problem-Solving (4-6 questions):**
+    *   "Imagine you're given a task to build [a small feature related to JD or resume skills]. What would be your initial steps and thought process?"
+    *   "How would you debug a situation where [common problem, e.g., 'a web application is running slower than expected']?"
+    *   "You've pushed code that inadvertently broke a feature in production for a personal project. What steps would you take immediately?"
+
+**Output Format:**
+Return a single, valid JSON object with the following structure. Do NOT include any text before or after the JSON object (e.g. no "```json" or "```").
+
+{
+    "technical": ["Question 1 about tech...", "Question 2 about tech..."],
+    "behavioral": ["Question 1 about behavior...", "Question 2 about behavior..."],
+    "project_specific": ["Question 1 about project...", "Question 2 about project..."],
+    "scenario_based": ["Scenario question 1...", "Scenario question 2..."]
+}
+"""
+
+# Full question prompt, compiled once: static prefix followed by the per-request inputs
+_QUESTION_PROMPT_TEMPLATE = string.Template(_STATIC_PROMPT_PREFIX + """
+**Input Materials:**
+---
+**Resume Content:**
+$resume
+---
+$jd_section
+---
+""")
+
+# Structured output: ask Gemini for JSON matching a schema instead of relying on the prose
+# instructions above. JSON mode can be slower on some backends, so GEMINI_JSON_MODE=0 switches
+# back to plain mode (where the reply may still come wrapped in ``` fences).
+GEMINI_JSON_MODE = os.getenv("GEMINI_JSON_MODE", "1") != "0"
+# Leading ```json / ``` and trailing ``` fences around a plain-mode reply
+_FENCE_RE = re.compile(r"\A\s*```(?:json)?\s*|\s*```\s*\Z")
+_QUESTION_CATEGORIES = ("technical", "behavioral", "project_specific", "scenario_based")
+# Order categories are shown in; prefetch follows it so the first questions on screen are the ones warmed
+_DISPLAY_ORDER = ("technical", "project_specific", "behavioral", "scenario_based")
+_QUESTIONS_GENERATION_CONFIG = {
+    "response_mime_type": "application/json",
+    "response_schema": {
+        "type": "object",
+        "properties": {category: {"type": "array", "items": {"type": "string"}} for category in _QUESTION_CATEGORIES},
+        "required": list(_QUESTION_CATEGORIES),
+    },
+}
+
 # --- AIQuestionGenerator Class (Gemini-Only) ---
 class AIQuestionGenerator:
     def __init__(self):
@@ -23,9 +167,9 @@ class AIQuestionGenerator:
         # st.write(f"Attempting to initialize AIQuestionGenerator with type: {self.model_type}") # Less verbose
         if self.gemini_api_key:
             try:
-                genai.configure(api_key=self.gemini_api_key)
                 self.model_name = os.getenv("GEMINI_MODEL_NAME", "gemini-1.5-flash-latest")
-                self.client = genai.GenerativeModel(self.model_name)
+                # Cached across reruns; editing the API key changes the cache key
+                self.client = _get_generator(self.gemini_api_key, self.model_name)
                 # Test call to verify client (optional, but good for immediate feedback)
                 # self.client.generate_content("test", generation_config=genai.types.GenerationConfig(max_output_tokens=5))
                 st.sidebar.success(f"Gemini initialized with {self.model_name}")
@@ -46,144 +190,167 @@ class AIQuestionGenerator:
             "scenario_based": []
         }
 
-    def generate_questions_from_text(self, resume_text_content: str, job_description_text: str | None = None):
+    @staticmethod
+    def _extract_text_or_error(response):
+        """Validate a (fully consumed) Gemini response and pull out its text.
+
+        Returns (text, None, None) on success and (None, error_detail, error_summary) on failure,
+        where error_detail is the full message for the UI and error_summary the concise form for
+        the returned error structure. If the response finished atypically but still has content,
+        returns (text, error_detail, error_summary) so the caller can decide whether to use the
+        partial text.
+        """
+        prompt_feedback = response.prompt_feedback
+        if prompt_feedback and prompt_feedback.block_reason:
+            reason = str(prompt_feedback.block_reason)
+            ratings = "\n".join([f"  - {r.category}: {r.probability}" for r in prompt_feedback.safety_ratings])
+            return (
+                None,
+                f"Gemini API blocked the prompt. Reason: {reason}.\nSafety Ratings:\n{ratings}",
+                f"Prompt blocked by safety settings (Reason: {reason})."
+            )
+
+        candidates = response.candidates
+        if not candidates:
+            return None, "Gemini API returned no candidates in the response.", "No candidates in API response."
+
+        candidate = candidates[0]
+        parts = candidate.content.parts if candidate.content else None
+        text = "".join(map(_get_text, parts)) if parts else ""
+
+        reason_val = candidate.finish_reason
+        # FINISH_REASON_UNSPECIFIED = 0; STOP = 1; MAX_TOKENS = 2; SAFETY = 3; RECITATION = 4; OTHER = 5;
+        if reason_val != 1 : # Not STOP
+            reason_map = {0: "UNSPECIFIED", 1: "STOP", 2: "MAX_TOKENS", 3: "SAFETY", 4: "RECITATION", 5: "OTHER"}
+            reason_str = reason_map.get(reason_val, f"UNKNOWN ({reason_val})")
+            error_detail = f"Gemini API request finished atypically. Reason: {reason_str}."
+            error_summary = f"API request finished: {reason_str}."
+            if candidate.safety_ratings:
+                ratings = "\n".join([f"  - {r.category}: {r.probability}" for r in candidate.safety_ratings])
+                error_detail += f"\nSafety Ratings:\n{ratings}"
+                error_summary += " Check safety ratings."
+            return (text if text.strip() else None), error_detail, error_summary
+
+        if not text.strip():
+            return (
+                None,
+                "Gemini API returned empty text content, possibly due to safety filters or an issue with the prompt response.",
+                "Empty text content from API."
+            )
+        return text, None, None
+
+    def _collect_stream(self, response, render=None):
+        """Consume a streamed response so its aggregated result can be validated.
+
+        `render` (if given) is called with the text so far on the first chunk and then every
+        STREAM_RENDER_EVERY chunks; chunk texts are kept in a list and only joined for those renders.
+        """
+        from google.generativeai.types import BlockedPromptException
+
+        try:
+            if render is None:
+                response.resolve()
+                return
+
+            chunks: list[str] = []
+            for n, chunk in enumerate(response, 1):
+                # Read the part texts straight off the proto rather than via the validating `chunk.text` accessor
+                candidates = chunk.candidates
+                if not candidates:
+                    continue
+                parts = candidates[0].content.parts
+                if parts:
+                    chunks.extend(map(_get_text, parts))
+                    # Draw the first chunk right away, then throttle
+                    if n == 1 or n % STREAM_RENDER_EVERY == 0:
+                        render("".join(chunks))
+        except BlockedPromptException:
+            # Streaming raises as soon as the prompt is blocked; the block reason stays on
+            # response.prompt_feedback and is reported by _extract_text_or_error.
+            pass
+
+    def generate_questions_from_text(self, resume_text_content: str, job_description_text: str | None = None, placeholder=None):
+        import google.api_core.exceptions # For more specific Gemini error types
+
         if not self.client or not self.is_configured:
             return self._return_error_structure(
                 "Gemini client not configured. Please check API key.",
                 "Gemini client not configured."
             )
 
+        # Input tokens drive cost and latency, so keep oversized documents within budget
+        resume_text_content = _truncate(resume_text_content, RESUME_MAX_CHARS)
+
         job_description_section = "No job description provided."
         if job_description_text and job_description_text.strip():
-            job_description_section = f"""
-        **Job Description:**
-        ---
-        {job_description_text}
-        ---"""
+            job_description_section = f"""**Job Description:**
+---
+{_truncate(job_description_text, JOB_DESCRIPTION_MAX_CHARS)}
+---"""
 
-        prompt = f"""
-        You are an expert technical interviewer and career coach. Your task is to generate insightful interview questions based on the provided resume and job description. Aim for a comprehensive set of at least 25 questions, tailored to help a candidate prepare for internship interviews.
+        prompt = _QUESTION_PROMPT_TEMPLATE.substitute(resume=resume_text_content, jd_section=job_description_section)
 
-        **Input Materials:**
-        ---
-        **Resume Content:**
-        {resume_text_content}
-        ---
-        {job_description_section}
-        ---
-
-        **Question Generation Guidelines:**
-        1.  **Relevance:** Prioritize questions that directly relate to skills, technologies, and experiences mentioned in BOTH the resume and the job description. If no JD, focus on resume.
-        2.  **Depth & Breadth:** Cover a range of topics from fundamental concepts to practical application.
-        3.  **Realism:** Formulate questions similar to those asked in actual internship interviews for tech roles.
-        4.  **Progression:** Include questions suitable for different interview stages (screening, technical deep-dive).
-        5.  **Clarity:** Ensure questions are unambiguous.
-
-        **Question Categories (ensure a good distribution, aiming for 25+ total):**
-
-        1.  **Technical Deep Dive (8-10 questions):**
-            *   Based on specific programming languages, frameworks, and tools listed (e.g., Python, React, Docker, Git).
-            *   Data structures and algorithms (e.g., "Explain how you would use a hash map to optimize [specific scenario from resume/JD]?").
-            *   Database concepts (SQL/NoSQL, querying, design if mentioned).
-            *   System design fundamentals (scaled appropriately for an intern, e.g., "How would you design a simple URL shortener, focusing on the API and data storage?").
-            *   Debugging and troubleshooting approaches.
-
-        2.  **Project-Specific (6-8 questions):**
-            *   Probe into specific projects listed on the resume.
-            *   "On project X, you mentioned using Y technology. Can you walk me through a specific challenge you faced and how you overcame it?"
-            *   "What was your specific contribution to project Z? How did you collaborate with others?"
-            *   "If you could redo project A, what would you do differently and why?"
-            *   "How did you test your work on project B?"
-
-        3.  **Behavioral & Situational (6-8 questions):** (Use STAR method for answering these)
-            *   "Describe a time you had to learn a new technology quickly for a project."
-            *   "Tell me about a challenging team project and how you handled disagreements."
-            *   "How do you approach a task when the requirements are unclear?"
-            *   "Describe a mistake you made and what you learned from it."
-            *   (If JD is present) "This role requires [skill from JD, e.g., 'strong problem-solving skills']. Can you give an example of how you've demonstrated this?"
-
-        4.  **Scenario-Based/Problem-Solving (4-6 questions):**
-            *   "Imagine you're given a task to build [a small feature related to JD or resume skills]. What would be your initial steps and thought process?"
-            *   "How would you debug a situation where [common problem, e.g., 'a web application is running slower than expected']?"
-            *   "You've pushed code that inadvertently broke a feature in production for a personal project. What steps would you take immediately?"
-
-        **Output Format:**
-        Return a single, valid JSON object with the following structure. Do NOT include any text before or after the JSON object (e.g. no "```json" or "```").
-
-        {{
-            "technical": ["Question 1 about tech...", "Question 2 about tech..."],
-            "behavioral": ["Question 1 about behavior...", "Question 2 about behavior..."],
-            "project_specific": ["Question 1 about project...", "Question 2 about project..."],
-            "scenario_based": ["Scenario question 1...", "Scenario question 2..."]
-        }}
-        """
+        generation_config = _QUESTIONS_GENERATION_CONFIG if GEMINI_JSON_MODE else None
 
         try:
-            response = self.client.generate_content(prompt)
-
-            # Detailed checks for Gemini response issues
-            if response.prompt_feedback and response.prompt_feedback.block_reason:
-                reason = str(response.prompt_feedback.block_reason)
-                ratings = "\n".join([f"  - {r.category}: {r.probability}" for r in response.prompt_feedback.safety_ratings])
+            response_cache = _get_response_cache()
+            cache_key = _response_cache_key(prompt, self.model_name, generation_config)
+            generated_text = response_cache.get(cache_key)
+            cache_result = generated_text is None
+            if generated_text is None:
+                # Stream so the raw JSON shows up in the placeholder as it arrives
+                response = self.client.generate_content(
+                    prompt,
+                    stream=True,
+                    generation_config=generation_config
+                )
+                try:
+                    self._collect_stream(
+                        response,
+                        (lambda text: placeholder.code(text, language="json")) if placeholder is not None else None
+                    )
+                finally:
+                    # Clear the raw JSON preview even if the stream fails midway
+                    if placeholder is not None:
+                        placeholder.empty()
+
+                generated_text, error_detail, error_summary = self._extract_text_or_error(response)
+                if generated_text is None:
+                    return self._return_error_structure(error_detail, error_summary)
+                if error_detail:
+                    # Content exists despite an atypical finish; use it but warn
+                    st.warning(error_detail + "\nAttempting to use partial content.")
+                    cache_result = False # Don't keep truncated/filtered output around
+
+            if not GEMINI_JSON_MODE:
+                # Plain mode: clean the response to ensure it's valid JSON
+                generated_text = _FENCE_RE.sub("", generated_text)
+            generated_text = generated_text.strip()
+            
+            # The reply must be a JSON object; if it doesn't end in } it was cut off, so don't bother parsing it
+            if generated_text[-1:] != "}":
                 return self._return_error_structure(
-                    f"Gemini API blocked the prompt. Reason: {reason}.\nSafety Ratings:\n{ratings}",
-                    f"Prompt blocked by safety settings (Reason: {reason})."
+                    "AI response ended before the JSON object was complete. Please try again.",
+                    "Incomplete JSON from API."
                 )
-
-            if not response.candidates:
+            questions = orjson.loads(generated_text) # Can raise JSONDecodeError
+            if not isinstance(questions, dict):
                 return self._return_error_structure(
-                    "Gemini API returned no candidates in the response.",
-                    "No candidates in API response."
+                    "AI response was valid JSON but not an object of question categories.",
+                    "Unexpected JSON structure from API."
                 )
-
-            candidate = response.candidates[0]
-            # FINISH_REASON_UNSPECIFIED = 0; STOP = 1; MAX_TOKENS = 2; SAFETY = 3; RECITATION = 4; OTHER = 5;
-            if candidate.finish_reason != 1 : # Not STOP
-                reason_map = {0: "UNSPECIFIED", 1: "STOP", 2: "MAX_TOKENS", 3: "SAFETY", 4: "RECITATION", 5: "OTHER"}
-                reason_val = candidate.finish_reason
-                reason_str = reason_map.get(reason_val, f"UNKNOWN ({reason_val})")
-                
-                error_detail_ui = f"Gemini API request finished atypically. Reason: {reason_str}."
-                error_detail_dict = f"API request finished: {reason_str}."
-
-                if candidate.safety_ratings:
-                    ratings = "\n".join([f"  - {r.category}: {r.probability}" for r in candidate.safety_ratings])
-                    error_detail_ui += f"\nSafety Ratings:\n{ratings}"
-                    error_detail_dict += " Check safety ratings."
-                
-                # If content exists despite atypical finish, try to use it but warn
-                if candidate.content and candidate.content.parts and any(p.text for p in candidate.content.parts if hasattr(p, 'text')):
-                    st.warning(error_detail_ui + "\nAttempting to use partial content.")
-                else: # No content and atypical finish reason
-                    return self._return_error_structure(error_detail_ui, error_detail_dict)
-
-            generated_text = ""
-            if candidate.content and candidate.content.parts:
-                generated_text = "".join(part.text for part in candidate.content.parts if hasattr(part, 'text') and part.text)
-            
-            if not generated_text.strip():
-                 return self._return_error_structure(
-                    "Gemini API returned empty text content, possibly due to safety filters or an issue with the prompt response.",
-                    "Empty text content from API."
-                 )
-
-            # Clean the response to ensure it's valid JSON
-            generated_text = generated_text.strip()
-            if generated_text.startswith("```json"):
-                generated_text = generated_text[7:]
-            if generated_text.endswith("```"):
-                generated_text = generated_text[:-3]
-            
-            questions = json.loads(generated_text) # Can raise JSONDecodeError
+            if cache_result:
+                response_cache.set(cache_key, generated_text, expire=RESPONSE_CACHE_TTL)
             
-            return {
-                "technical": questions.get("technical", []),
-                "behavioral": questions.get("behavioral", []),
-                "project_specific": questions.get("project_specific", []),
-                "scenario_based": questions.get("scenario_based", [])
-            }
+            # Normalise the parsed dict in place rather than copying it: drop keys the model made up
+            # (the UI, prefetch and success check only expect the known categories) and fill in missing ones
+            for key in questions.keys() - set(_QUESTION_CATEGORIES):
+                del questions[key]
+            for category in _QUESTION_CATEGORIES:
+                questions.setdefault(category, [])
+            return questions
         
-        except json.JSONDecodeError as je:
+        except orjson.JSONDecodeError as je: # Subclass of json.JSONDecodeError
             return self._return_error_structure(
                 f"Error decoding JSON from AI response: {je}. Check the raw response below.",
                 f"Malformed JSON from API: {je}",
@@ -201,13 +368,9 @@ class AIQuestionGenerator:
                 f"Unexpected error: {e}"
             )
 
-    def generate_answer_for_question(self, question_text):
-        if not self.client or not self.is_configured:
-            return "Gemini client not configured. Cannot generate answer."
-        if not question_text:
-            return "No question provided to generate an answer."
-
-        prompt = f"""
+    @staticmethod
+    def _build_answer_prompt(question_text):
+        return f"""
         You are an expert interviewer, career coach, and industry professional.
         A candidate has been asked the following interview question:
         ---
@@ -216,33 +379,92 @@ class AIQuestionGenerator:
         Provide a model answer. (Instructions from previous prompt are still relevant)
         """ # Simplified prompt for brevity, original detailed prompt for answer generation is good.
 
+    def generate_answer_for_question(self, question_text, placeholder=None):
+        if not self.client or not self.is_configured:
+            return "Gemini client not configured. Cannot generate answer."
+        if not question_text:
+            return "No question provided to generate an answer."
+
+        prompt = self._build_answer_prompt(question_text)
+
         try:
-            response = self.client.generate_content(prompt)
-            if response.prompt_feedback and response.prompt_feedback.block_reason:
-                return f"Answer generation blocked by Gemini. Reason: {response.prompt_feedback.block_reason}"
-            if not response.candidates:
-                return "Gemini returned no candidates for the answer."
-            
-            candidate = response.candidates[0]
-            if candidate.finish_reason != 1: # Not STOP
-                return f"Answer generation finished atypically. Reason: {candidate.finish_reason}"
+            response_cache = _get_response_cache()
+            cache_key = _response_cache_key(prompt, self.model_name)
+            cached_answer = response_cache.get(cache_key)
+            if cached_answer is not None:
+                return cached_answer
 
-            if candidate.content and candidate.content.parts:
-                return "".join(part.text for part in candidate.content.parts if hasattr(part, 'text') and part.text).strip()
-            return "No text content found in Gemini response for the answer."
+            response = self.client.generate_content(prompt, stream=True)
+            self._collect_stream(response, placeholder.markdown if placeholder is not None else None)
+
+            answer, error_detail, _ = self._extract_text_or_error(response)
+            if error_detail:
+                return error_detail
+
+            answer = answer.strip()
+            response_cache.set(cache_key, answer, expire=RESPONSE_CACHE_TTL)
+            return answer
 
         except Exception as e:
             st.error(f"Error generating answer with Gemini: {e}") # Log to streamlit console
             return f"Error generating answer: {str(e)}"
 
+    async def _gen_answer_async(self, question_text, response_cache, semaphore):
+        """Generate one answer and store it in `response_cache`.
+
+        Runs on the prefetch thread, which has no script context, so no st.* calls (including the
+        st.cache_resource getters); the cache handle is passed in from the script thread.
+        """
+        prompt = self._build_answer_prompt(question_text)
+        cache_key = _response_cache_key(prompt, self.model_name)
+        if cache_key in response_cache:
+            return
+
+        async with semaphore: # Stay under the provider's rate limit
+            response = await self.client.generate_content_async(prompt)
+        answer, error_detail, _ = self._extract_text_or_error(response)
+        if error_detail: # Leave blocked/atypical responses to the on-click path
+            return
+        response_cache.set(cache_key, answer.strip(), expire=RESPONSE_CACHE_TTL)
+
+    def prefetch_answers(self, questions_data, limit=ANSWER_PREFETCH_COUNT):
+        """Pre-generate answers for the first `limit` questions concurrently in the background.
+
+        Results land in the response cache, so a later "Get Answer" click for one of them returns instantly.
+        """
+        if not self.client or not self.is_configured:
+            return
+        questions = [
+            q for category in _DISPLAY_ORDER if isinstance(questions_data.get(category), list)
+            for q in questions_data[category] if isinstance(q, str) and not q.startswith("Error:")
+        ][:limit]
+        if not questions:
+            return
+
+        response_cache = _get_response_cache()
+
+        async def _gather():
+            # Best effort: a failed prefetch just means that answer is generated on click
+            semaphore = asyncio.Semaphore(ANSWER_PREFETCH_CONCURRENCY)
+            await asyncio.gather(
+                *(self._gen_answer_async(q, response_cache, semaphore) for q in questions),
+                return_exceptions=True
+            )
+
+        asyncio.run_coroutine_threadsafe(_gather(), _get_prefetch_loop())
+
 # --- Helper Function ---
-def extract_text_from_pdf_bytes(pdf_bytes):
-    text = ""
+# Resumes are rarely longer than a few pages; cap extraction so huge uploads stay cheap
+MAX_PDF_PAGES = int(os.getenv("MAX_PDF_PAGES", "5"))
+
+@st.cache_data(max_entries=8, ttl=3600)
+def extract_text_from_pdf_bytes(pdf_bytes: bytes) -> str | None:
+    import fitz  # PyMuPDF
     try:
-        doc = fitz.open(stream=pdf_bytes, filetype="pdf")
-        for page in doc:
-            text += page.get_text()
-        doc.close()
+        with fitz.open(stream=pdf_bytes, filetype="pdf") as doc:
+            text = "".join(page.get_text() for page in itertools.islice(doc, MAX_PDF_PAGES))
+            if doc.page_count > MAX_PDF_PAGES:
+                st.warning(f"PDF has {doc.page_count} pages; only the first {MAX_PDF_PAGES} were used.")
     except Exception as e:
         st.error(f"Error extracting text from PDF: {str(e)}")
         return None
@@ -294,14 +516,17 @@ uploaded_file = st.file_uploader("1. Upload your Resume (PDF only)", type="pdf")
 if uploaded_file:
     if 'resume_filename' not in st.session_state or st.session_state.resume_filename != uploaded_file.name:
         st.session_state.resume_filename = uploaded_file.name
-        st.session_state.resume_bytes = uploaded_file.getvalue()
-        st.session_state.resume_text = extract_text_from_pdf_bytes(st.session_state.resume_bytes)
         if 'generated_questions' in st.session_state: del st.session_state.generated_questions
         if 'current_question_to_answer' in st.session_state: del st.session_state.current_question_to_answer
         if 'current_answer' in st.session_state: del st.session_state.current_answer
 
-    if st.session_state.resume_bytes:
-        st.download_button("📥 Download Uploaded Resume", st.session_state.resume_bytes, st.session_state.resume_filename, "application/pdf")
+    # Extraction is memoized on the PDF bytes, so reruns and re-uploads are cache hits.
+    # Only the extracted text is kept in session state; the raw bytes stay with the uploader.
+    resume_bytes = uploaded_file.getvalue()
+    st.session_state.resume_text = extract_text_from_pdf_bytes(resume_bytes)
+
+    if resume_bytes:
+        st.download_button("📥 Download Uploaded Resume", resume_bytes, st.session_state.resume_filename, "application/pdf")
 
     if st.session_state.resume_text:
         with st.expander("View Extracted Resume Text (first 1000 chars)"):
@@ -318,7 +543,8 @@ if st.button("🧠 Generate Interview Questions", disabled=not uploaded_file or
         with st.spinner("Generating questions with Gemini... This may take a moment."):
             questions_data = st.session_state.ai_question_gen.generate_questions_from_text(
                 st.session_state.resume_text,
-                job_description
+                job_description,
+                placeholder=st.empty()
             )
             st.session_state.generated_questions = questions_data
             if 'current_question_to_answer' in st.session_state: del st.session_state.current_question_to_answer
@@ -340,14 +566,15 @@ if st.button("🧠 Generate Interview Questions", disabled=not uploaded_file or
 
             if not is_error_in_response and has_any_actual_questions:
                 st.success("Questions generated!")
+                st.session_state.ai_question_gen.prefetch_answers(questions_data)
             # Error messages are displayed by AIQuestionGenerator directly using st.error
 
     else:
         st.warning("Please upload a resume first.")
 
-if 'generated_questions' in st.session_state and st.session_state.generated_questions:
-    st.subheader("🎯 Generated Interview Questions:")
-    q_data = st.session_state.generated_questions
+@st.fragment
+def _render_questions(q_data, ai_gen):
+    """Render the question list. As a fragment, "Get Answer" clicks rerun only this block."""
     categories = {
         "technical": "💻 Technical Deep Dive",
         "project_specific": "🛠️ Project-Specific",
@@ -355,7 +582,8 @@ if 'generated_questions' in st.session_state and st.session_state.generated_ques
         "scenario_based": "🧠 Scenario-Based/Problem-Solving"
     }
 
-    for cat_key, cat_name in categories.items():
+    for cat_key in _DISPLAY_ORDER:
+        cat_name = categories[cat_key]
         if q_data.get(cat_key):
             st.markdown(f"#### {cat_name}")
             # Check if the only content in this category is an error message
@@ -381,15 +609,20 @@ if 'generated_questions' in st.session_state and st.session_state.generated_ques
                             st.session_state.current_answer = "loading"
                     
                     if 'current_question_to_answer' in st.session_state and st.session_state.current_question_to_answer == question:
-                        if st.session_state.current_answer == "loading":
-                            with st.spinner("Generating answer with Gemini..."):
-                                answer = st.session_state.ai_question_gen.generate_answer_for_question(question)
+                        with st.expander(f"🤖 Model Answer for: \"{question[:50]}...\"", expanded=True):
+                            answer_placeholder = st.empty()
+                            if st.session_state.current_answer == "loading":
+                                # Words stream into the placeholder while the answer is generated
+                                answer = ai_gen.generate_answer_for_question(question, placeholder=answer_placeholder)
                                 st.session_state.current_answer = answer
-                        
-                        if st.session_state.current_answer and st.session_state.current_answer != "loading":
-                            with st.expander(f"🤖 Model Answer for: \"{question[:50]}...\"", expanded=True):
-                                st.markdown(st.session_state.current_answer)
+
+                            if st.session_state.current_answer:
+                                answer_placeholder.markdown(st.session_state.current_answer)
             st.markdown("---")
 
+if 'generated_questions' in st.session_state and st.session_state.generated_questions:
+    st.subheader("🎯 Generated Interview Questions:")
+    _render_questions(st.session_state.generated_questions, st.session_state.get('ai_question_gen'))
+
 st.sidebar.markdown("---")
 st.sidebar.markdown("Powered by Google Gemini")
\ No newline at end of file